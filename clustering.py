@@ -0,0 +1,170 @@
+import json
+from typing import Dict, List, Any, Optional, Tuple
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.preprocessing import normalize
+
+class UserClusterer:
+    def __init__(self, output_path: str, n_clusters: int = 5,
+                 batch_size: int = 1024, random_state: int = 42):
+        self.output_path = Path(output_path)
+        self.assignments_file = self.output_path / "user_clusters.csv"
+        self.profiles_file = self.output_path / "cluster_profiles.csv"
+        self.meta_file = self.output_path / "user_clusters.json"
+        self.n_clusters = n_clusters
+        self.batch_size = batch_size
+        self.random_state = random_state
+        self.assignments: Optional[pd.DataFrame] = None
+        self.profiles: Optional[pd.DataFrame] = None
+        self.cluster_sizes: Optional[pd.Series] = None
+        # Identifies the data and settings the current results were fitted on
+        self.fit_key: Optional[str] = None
+
+    def build_feature_matrix(self, df: pd.DataFrame) -> Tuple[pd.Index, pd.Index, sparse.csr_matrix]:
+        """
+        Build a sparse user x component count matrix from merged or interaction data
+        """
+        try:
+            user_codes, user_ids = pd.factorize(df['User_ID'], sort=True)
+            component_codes, components = pd.factorize(df['Component'], sort=True)
+
+            # Interaction counts are pre-aggregated, raw logs count one per row
+            if 'Interaction_Count' in df.columns:
+                weights = df['Interaction_Count'].to_numpy(dtype=np.float64)
+            else:
+                weights = np.ones(len(df), dtype=np.float64)
+
+            # Duplicate (user, component) pairs are summed on conversion
+            matrix = sparse.coo_matrix(
+                (weights, (user_codes, component_codes)),
+                shape=(len(user_ids), len(components))
+            ).tocsr()
+
+            return pd.Index(user_ids, name='User_ID'), pd.Index(components, name='Component'), matrix
+
+        except Exception as e:
+            raise Exception(f"Error building feature matrix: {str(e)}")
+
+    def fit(self, df: pd.DataFrame, n_clusters: Optional[int] = None,
+            fit_key: Optional[str] = None) -> pd.DataFrame:
+        """
+        Cluster users by their component usage with mini-batch k-means.
+        Features are log-scaled and L2-normalised so clusters reflect the
+        mix of components a user works with rather than raw volume.
+        """
+        try:
+            user_ids, components, counts = self.build_feature_matrix(df)
+
+            if len(user_ids) == 0:
+                raise ValueError("No users available to cluster")
+
+            k = min(n_clusters or self.n_clusters, len(user_ids))
+
+            features = counts.copy()
+            features.data = np.log1p(features.data)
+            features = normalize(features, norm='l2', axis=1)
+
+            model = MiniBatchKMeans(
+                n_clusters=k,
+                batch_size=self.batch_size,
+                random_state=self.random_state,
+                n_init=3
+            )
+            labels = model.fit_predict(features)
+
+            # Average raw interactions per component for each cluster
+            membership = sparse.csr_matrix(
+                (np.ones(len(labels)), (labels, np.arange(len(labels)))),
+                shape=(k, len(labels))
+            )
+            sizes = np.bincount(labels, minlength=k)
+            totals = np.asarray((membership @ counts).todense())
+            means = totals / np.maximum(sizes, 1)[:, None]
+
+            self.profiles = pd.DataFrame(means, columns=components)
+            self.profiles.index.name = 'Cluster'
+            self.cluster_sizes = pd.Series(sizes, name='Users')
+            self.cluster_sizes.index.name = 'Cluster'
+            self.assignments = pd.DataFrame({
+                'User_ID': user_ids,
+                'Cluster': labels,
+                'Total_Interactions': np.asarray(counts.sum(axis=1)).ravel()
+            })
+            self.fit_key = fit_key
+
+            self._save_results()
+
+            print(f"Clustered {len(user_ids)} users into {k} clusters")
+
+            return self.assignments
+
+        except Exception as e:
+            raise Exception(f"User clustering failed: {str(e)}")
+
+    def _save_results(self) -> None:
+        try:
+            self.output_path.mkdir(parents=True, exist_ok=True)
+            self.assignments.to_csv(self.assignments_file, index=False)
+
+            profiles = self.profiles.copy()
+            profiles.insert(0, 'Users', self.cluster_sizes)
+            profiles.to_csv(self.profiles_file)
+
+            with self.meta_file.open('w', encoding='utf-8') as f:
+                json.dump({'fit_key': self.fit_key}, f)
+
+        except Exception as e:
+            print(f"Error saving cluster results: {str(e)}")
+
+    def load_results(self) -> bool:
+        """
+        Load previously saved cluster assignments and profiles
+        """
+        try:
+            if not (self.assignments_file.exists() and self.profiles_file.exists()
+                    and self.meta_file.exists()):
+                return False
+
+            with self.meta_file.open('r', encoding='utf-8') as f:
+                self.fit_key = json.load(f).get('fit_key')
+
+            self.assignments = pd.read_csv(self.assignments_file)
+            profiles = pd.read_csv(self.profiles_file, index_col='Cluster')
+            self.cluster_sizes = profiles.pop('Users')
+            self.profiles = profiles
+            return True
+
+        except Exception as e:
+            print(f"Error loading cluster results: {str(e)}")
+            return False
+
+    def fit_or_load(self, df: pd.DataFrame, n_clusters: Optional[int] = None,
+                    fit_key: Optional[str] = None) -> pd.DataFrame:
+        """
+        Reuse the in-memory or saved results if they were fitted with the
+        same fit_key, otherwise cluster again
+        """
+        if fit_key is not None:
+            if self.assignments is not None and self.fit_key == fit_key:
+                return self.assignments
+            if self.load_results() and self.fit_key == fit_key:
+                print("Loaded saved user clusters")
+                return self.assignments
+
+        return self.fit(df, n_clusters, fit_key)
+
+    def get_cluster_summary(self) -> pd.DataFrame:
+        """
+        One row per cluster with its size and dominant component
+        """
+        if self.profiles is None:
+            raise ValueError("Please cluster users first!")
+
+        return pd.DataFrame({
+            'Users': self.cluster_sizes,
+            'Top_Component': self.profiles.idxmax(axis=1),
+            'Mean_Interactions': self.profiles.sum(axis=1)
+        })
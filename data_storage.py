@@ -1,77 +1,275 @@
+import base64
 import csv
+import functools
+import hashlib
 import json
 import os
+import threading
+import weakref
 from datetime import datetime
-from typing import Dict, List, Any, Set, Tuple, Optional
+from typing import Dict, List, Any, Set, Tuple, Optional, Callable
 from pathlib import Path
+import numpy as np
 import pandas as pd
+from scipy import sparse
+from clustering import UserClusterer
+from snapshot import write_snapshot, SNAPSHOT_SUFFIX
+from sketches import EngagementSketches
+from scheduler import IngestionScheduler
+from row_hash_index import RowHashIndex
+from memory_governor import MemoryGovernor, GovernedFrames
+
+def synchronized(method: Callable) -> Callable:
+    """
+    Run a DataProcessor method under its lock, so the watch-folder scheduler
+    and GUI never run steps that change processed data at the same time.
+    Readers don't take this lock; see DataProcessor._state_lock.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
 
 class DataProcessor:
-    def __init__(self, backup_file_path: str):
+    def __init__(self, backup_file_path: str, read_only: bool = False,
+                 memory: Optional[MemoryGovernor] = None):
         self.backup_file_path = Path(backup_file_path)
+        # Never writes to the backup folder, e.g. for the query service
+        self.read_only = read_only
+        self.lock = threading.RLock()
+        # Held only while state attributes are read or replaced, so readers
+        # get a consistent view without waiting for a long pipeline step
+        self._state_lock = threading.RLock()
         self.state_file = self.backup_file_path / "application_state.json"
-        self.data: Dict[str, List[Dict[str, Any]]] = {}
+        # One frame per dataset; records only exist when state is written out.
+        # With a governor the datasets count against its memory budget.
+        self.data = GovernedFrames(memory, prefix="dataset_")
         self.excluded_components: Set[str] = {'System', 'Folder'}
         self.column_mappings = {
             "User Full Name *Anonymized": "User_ID"
         }
         self.stats: Dict[str, Dict[str, int]] = {}
         self.processed_files: Set[str] = set()
+        self.user_clusterer = UserClusterer(backup_file_path)
+        # Sketches of this processor's merged rows, updated incrementally
+        self.sketches = EngagementSketches()
+        # Hashes of the merged rows already in self.sketches; None if unknown
+        self._sketched_rows: Optional[np.ndarray] = np.empty(0, dtype=np.uint64)
+        # Sketches combined in from other files or shards via merge_sketches
+        self.shard_sketches = EngagementSketches()
+        self.scheduler: Optional[IngestionScheduler] = None
+        self.preview_rows = 1000
+        self._parsed_frames: Dict[str, Tuple[Tuple[float, int], pd.DataFrame]] = {}
+        self._correlation_cache: Dict[Tuple[int, bool], Tuple[weakref.ref, Dict[str, Any]]] = {}
+        # Bumped whenever processed data changes so caches can tell they are stale
+        self.data_version = 0
         self._ensure_backup_path()
+        self.row_index = RowHashIndex(self.backup_file_path)
         self._load_state()
 
     def _ensure_backup_path(self) -> None:
+        if self.read_only:
+            return
         self.backup_file_path.mkdir(parents=True, exist_ok=True)
 
     def _load_state(self) -> None:
         try:
             if self.state_file.exists():
                 with self.state_file.open('r', encoding='utf-8') as f:
-                    state = json.load(f)
-                    self.data = state.get('data', {})
-                    self.stats = state.get('stats', {})
-                    self.processed_files = set(state.get('processed_files', []))
-                    self.excluded_components = set(state.get('excluded_components', 
-                                                          {'System', 'Folder'}))
+                    self._apply_state(json.load(f))
                 print("Previous state loaded successfully")
         except Exception as e:
             print(f"Error loading state: {str(e)}")
+            if self.read_only:
+                # Possibly caught mid-write: start empty, reload_state retries
+                return
             self._initialize_new_state()
 
+    def _apply_state(self, state: Dict[str, Any]) -> None:
+        data = {
+            dataset_name: pd.DataFrame(records)
+            for dataset_name, records in state.get('data', {}).items()
+        }
+        processed_files = {
+            self._file_key(file_path) for file_path in state.get('processed_files', [])
+        }
+        sketches = EngagementSketches.from_dict(state.get('sketches', {}))
+        shard_sketches = EngagementSketches.from_dict(state.get('shard_sketches', {}))
+        # State saved before rows were tracked gets its sketches rebuilt on the next merge
+        sketched_rows = None
+        if 'sketched_rows' in state:
+            sketched_rows = np.frombuffer(base64.b64decode(state['sketched_rows']),
+                                          dtype=np.uint64).copy()
+        
+        with self._state_lock:
+            self.data.clear()
+            self.data.update(data)
+            self.stats = state.get('stats', {})
+            self.processed_files = processed_files
+            self.excluded_components = set(state.get('excluded_components', 
+                                                  {'System', 'Folder'}))
+            self.sketches = sketches
+            self.shard_sketches = shard_sketches
+            self._sketched_rows = sketched_rows
+
+    @synchronized
+    def reload_state(self) -> bool:
+        """
+        Re-read the state file saved by another process, e.g. the GUI.
+        If it can't be read (possibly mid-write) the current data is kept.
+        """
+        try:
+            with self.state_file.open('r', encoding='utf-8') as f:
+                state = json.load(f)
+        except Exception as e:
+            print(f"Error reloading state: {str(e)}")
+            return False
+
+        self._apply_state(state)
+        self._mark_data_changed()
+        return True
+
     def _initialize_new_state(self) -> None:
-        self.data = {}
-        self.stats = {}
-        self.processed_files = set()
+        with self._state_lock:
+            self.data.clear()
+            self._mark_data_changed()
+            self.sketches = EngagementSketches()
+            self._sketched_rows = np.empty(0, dtype=np.uint64)
+            self.shard_sketches = EngagementSketches()
+            self.stats = {}
+            self.processed_files = set()
+        if self.read_only:
+            return
+        # Earlier rows are gone, so they must not count as duplicates any more
+        self.row_index.clear()
         self._save_state()
 
+    def _data_fingerprint(self) -> str:
+        """
+        Stable across sessions: changes whenever files are processed,
+        filtered or have their columns renamed
+        """
+        state = json.dumps({
+            'stats': self.stats,
+            'columns': {name: list(df.columns) for name, df in self.data.items()},
+            'processed_files': sorted(self.processed_files),
+            'excluded_components': sorted(self.excluded_components)
+        }, sort_keys=True, default=str)
+        return hashlib.sha1(state.encode('utf-8')).hexdigest()
+
+    def _mark_data_changed(self) -> None:
+        with self._state_lock:
+            self.data_version += 1
+            self._correlation_cache.clear()
+
+    @synchronized
     def _save_state(self) -> None:
+        if self.read_only:
+            return
         try:
             state = {
                 'stats': self.stats,
                 'processed_files': list(self.processed_files),
                 'excluded_components': list(self.excluded_components),
                 'last_updated': datetime.now().isoformat(),
-                'data': self.data
+                'sketches': self.sketches.to_dict(),
+                'shard_sketches': self.shard_sketches.to_dict(),
+                'data': {
+                    dataset_name: df.to_dict('records')
+                    for dataset_name, df in self.data.items()
+                }
             }
+            if self._sketched_rows is not None:
+                state['sketched_rows'] = base64.b64encode(self._sketched_rows.tobytes()).decode('ascii')
             
             with self.state_file.open('w', encoding='utf-8') as f:
-                json.dump(state, f, indent=4)
+                json.dump(state, f, indent=4, default=str)
                 
         except Exception as e:
             print(f"Error saving state: {str(e)}")
 
-    def _clean_csv_data(self, file_path: Path) -> pd.DataFrame:
+    def _file_key(self, file_path: str) -> str:
         """
-        Clean and validate CSV data before processing
+        Absolute, resolved path used to identify a file however it was given
+        """
+        return str(Path(file_path).resolve())
+
+    def is_processed(self, file_path: str) -> bool:
+        return self._file_key(file_path) in self.processed_files
+
+    def forget_file(self, file_path: str) -> None:
+        """
+        Allow a file to be processed again, e.g. after it changed on disk
+        """
+        with self._state_lock:
+            self.processed_files.discard(self._file_key(file_path))
+
+    def _file_signature(self, file_path: Path) -> Tuple[float, int]:
+        stat = file_path.stat()
+        return (stat.st_mtime, stat.st_size)
+
+    def _read_csv(self, file_path: Path, nrows: Optional[int] = None) -> pd.DataFrame:
+        """
+        Read a CSV with the options shared by preview and processing
+        """
+        return pd.read_csv(
+            file_path,
+            encoding='utf-8',
+            na_values=['', 'NA', 'N/A', 'null', 'NULL', 'NaN'],
+            dtype_backend='numpy_nullable',
+            nrows=nrows
+        )
+
+    def _count_csv_rows(self, file_path: Path) -> int:
+        """
+        Count data rows by scanning line breaks without parsing the file
+        """
+        lines = 0
+        last_byte = b'\n'
+        with file_path.open('rb') as f:
+            while chunk := f.read(1 << 20):
+                lines += chunk.count(b'\n')
+                last_byte = chunk[-1:]
+        if last_byte != b'\n':
+            lines += 1
+        return max(lines - 1, 0)
+
+    def preview_csv(self, file_path: str, nrows: Optional[int] = None) -> Tuple[pd.DataFrame, int]:
+        """
+        Read a head sample of a CSV file and its row count.
+        Files small enough to be read whole by the preview are kept so
+        processing can reuse the parsed frame instead of reading it again.
         """
         try:
-            # Read CSV with more robust error handling
-            df = pd.read_csv(
-                file_path,
-                encoding='utf-8',
-                na_values=['', 'NA', 'N/A', 'null', 'NULL', 'NaN'],
-                dtype_backend='numpy_nullable'
-            )
+            path = Path(self._file_key(file_path))
+            nrows = nrows or self.preview_rows
+            
+            head = self._read_csv(path, nrows=nrows)
+            
+            if len(head) < nrows:
+                # The sample is the whole file
+                self._parsed_frames[str(path)] = (self._file_signature(path), head)
+                return head, len(head)
+            
+            return head, self._count_csv_rows(path)
+            
+        except Exception as e:
+            raise Exception(f"Error previewing {file_path}: {str(e)}")
+
+    def _clean_csv_data(self, file_path: Path, peers: Optional[List[str]] = None,
+                        staged: Optional[Dict[str, np.ndarray]] = None) -> pd.DataFrame:
+        """
+        Clean and validate CSV data before processing. Rows already ingested
+        from peers (other files feeding the same dataset) are dropped.
+        """
+        try:
+            # Reuse the frame parsed at preview time if the file is unchanged
+            cached = self._parsed_frames.pop(str(file_path), None)
+            if cached is not None and cached[0] == self._file_signature(file_path):
+                df = cached[1]
+            else:
+                df = self._read_csv(file_path)
             
             # Drop completely empty rows and columns
             df = df.dropna(how='all').dropna(axis=1, how='all')
@@ -88,20 +286,74 @@ class DataProcessor:
                     # Fill missing numeric values with 0
                     df[col] = df[col].fillna(0)
             
-            # Remove duplicate rows
-            df = df.drop_duplicates()
+            # Remove duplicate rows, including rows ingested from other files
+            df, within_file, across_files = self.row_index.deduplicate(str(file_path), df, peers or [], staged)
+            if within_file or across_files:
+                print(f"Removed {within_file} duplicate rows and "
+                      f"{across_files} rows already ingested from other files")
             
-            # Sort DataFrame by any date column if it exists
-            date_cols = [col for col in df.columns if 'date' in col.lower()]
-            if date_cols:
-                df[date_cols[0]] = pd.to_datetime(df[date_cols[0]], errors='coerce')
-                df = df.sort_values(date_cols[0])
-            
-            return df
+            return self._sort_by_date(df)
         
         except Exception as e:
             raise Exception(f"Error cleaning CSV data: {str(e)}")
 
+    def _sort_by_date(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Sort DataFrame by any date column if it exists
+        """
+        date_cols = [col for col in df.columns if 'date' in col.lower()]
+        if date_cols:
+            df[date_cols[0]] = pd.to_datetime(df[date_cols[0]], errors='coerce')
+            df = df.sort_values(date_cols[0])
+        return df
+
+    def _dataset_sources(self, dataset_name: str) -> List[str]:
+        """
+        Processed files feeding a dataset, e.g. the same export from several folders
+        """
+        return sorted(
+            file_path for file_path in self.processed_files
+            if Path(file_path).stem.upper() == dataset_name
+        )
+
+    def _append_rows(self, dataset_name: str, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Add rows from another file to a dataset, using the dataset's
+        renamed columns where it has them
+        """
+        existing = self.data[dataset_name]
+        mappings = {old: new for old, new in self.column_mappings.items()
+                    if new in existing.columns and old in df.columns}
+        combined = pd.concat([existing, df.rename(columns=mappings)], ignore_index=True)
+        return self._sort_by_date(combined)
+
+    def _rebuild_dataset(self, dataset_name: str, sources: List[str]) -> pd.DataFrame:
+        """
+        Clean every file feeding a dataset again, so the rows of a changed
+        file replace its earlier rows instead of being added to them.
+        New hashes are staged and only replace the index entries once every
+        file was read, so a failure leaves the index as it was.
+        """
+        staged: Dict[str, np.ndarray] = {}
+        frames = []
+        missing = []
+        for source in sources:
+            if not Path(source).exists():
+                missing.append(source)
+                continue
+            peers = [peer for peer in sources if peer != source]
+            frames.append(self._clean_csv_data(Path(source), peers, staged))
+
+        for source in missing:
+            print(f"Dropping rows of missing file from {dataset_name}: {source}")
+            self.row_index.forget(source)
+            with self._state_lock:
+                self.processed_files.discard(source)
+        self.row_index.hashes.update(staged)
+
+        return self._sort_by_date(pd.concat(frames, ignore_index=True))
+
+    @synchronized
     def process_csv_files(self, *file_paths: str) -> None:
         """
         Process CSV files and save them as JSON.
@@ -111,31 +363,41 @@ class DataProcessor:
         
         for file_path in file_paths:
             try:
-                path = Path(file_path)
+                path = Path(self._file_key(file_path))
                 
                 if str(path) in self.processed_files:
                     print(f"Skipping already processed file: {path}")
                     continue
                     
                 dataset_name = path.stem.upper()  # Normalize dataset names
+                other_sources = [source for source in self._dataset_sources(dataset_name)
+                                 if source != str(path)]
                 
                 # Clean and validate the data
-                df = self._clean_csv_data(path)
-                
-                # Convert DataFrame to list of dictionaries for JSON storage
-                records = df.to_dict('records')
+                if not other_sources or dataset_name not in self.data:
+                    df = self._clean_csv_data(path)
+                elif str(path) in self.row_index.hashes:
+                    # A changed file that shares its dataset with other files
+                    df = self._rebuild_dataset(dataset_name, other_sources + [str(path)])
+                else:
+                    # Another export of the same dataset: keep the rows already held
+                    df = self._append_rows(dataset_name,
+                                           self._clean_csv_data(path, other_sources))
                 
-                total_rows = len(records)
+                df = df.reset_index(drop=True)
                 
-                # Store statistics with original row count
-                self.stats[dataset_name] = {
-                    'total_rows': total_rows,
-                    'original_rows': total_rows,  # Add this line explicitly
-                    'processed_at': datetime.now().isoformat()
-                }
+                total_rows = len(df)
                 
-                self.data[dataset_name] = records
-                self.processed_files.add(str(path))
+                with self._state_lock:
+                    # Store statistics with original row count
+                    self.stats[dataset_name] = {
+                        'total_rows': total_rows,
+                        'original_rows': total_rows,  # Add this line explicitly
+                        'processed_at': datetime.now().isoformat()
+                    }
+                    
+                    self.data[dataset_name] = df
+                    self.processed_files.add(str(path))
                 newly_processed = True
                 
                 print(f"Successfully processed {dataset_name}")
@@ -146,48 +408,55 @@ class DataProcessor:
                 continue
         
         if newly_processed:
-            self._save_json_records()
+            self._mark_data_changed()
+            if not self.read_only:
+                self.row_index.save()
+            self._save_snapshot()
             self._save_state()
 
+    @synchronized
     def remove_excluded_components(self) -> None:
         """
-        Filter out records with excluded components from the JSON data.
+        Filter out records with excluded components from the processed data.
         Updates statistics after filtering.
         """
         try:
-            for dataset_name, records in self.data.items():
+            for dataset_name in list(self.data):
+                df = self.data[dataset_name]
                 # Get original row count or use total rows as fallback
                 original_rows = self.stats[dataset_name].get('original_rows', 
                                                         self.stats[dataset_name].get('total_rows', 0))
                 
                 # Filter out excluded components
-                filtered_records = [
-                    record for record in records 
-                    if record.get('Component') not in self.excluded_components
-                ]
+                if 'Component' in df.columns:
+                    df = df[~df['Component'].isin(self.excluded_components)].reset_index(drop=True)
                 
-                # Update statistics
-                filtered_rows = len(filtered_records)
-                self.stats[dataset_name].update({
-                    'filtered_rows': filtered_rows,
-                    'removed_rows': original_rows - filtered_rows,
-                    'filtered_at': datetime.now().isoformat()
-                })
-                
-                # Update data with filtered records
-                self.data[dataset_name] = filtered_records
+                with self._state_lock:
+                    # Update statistics
+                    filtered_rows = len(df)
+                    self.stats[dataset_name].update({
+                        'filtered_rows': filtered_rows,
+                        'removed_rows': original_rows - filtered_rows,
+                        'filtered_at': datetime.now().isoformat()
+                    })
+                    
+                    # Update data with filtered records
+                    self.data[dataset_name] = df
                 
                 print(f"\nFiltering results for {dataset_name}:")
                 print(f"Original rows: {original_rows}")
                 print(f"Rows after filtering: {filtered_rows}")
                 print(f"Removed rows: {original_rows - filtered_rows}")
                 
+            self._mark_data_changed()
+            
             # Save updated state
             self._save_state()
             
         except Exception as e:
             raise Exception(f"Error removing excluded components: {str(e)}")
         
+    @synchronized
     def rename_user_column(self) -> None:
         """
         Rename 'User Full Name *Anonymized' column to 'User_ID' in all datasets.
@@ -196,32 +465,35 @@ class DataProcessor:
             old_key = "User Full Name *Anonymized"
             new_key = "User_ID"
             
-            for dataset_name, records in self.data.items():
-                # Rename column in each record
-                for record in records:
-                    if old_key in record:
-                        record[new_key] = record.pop(old_key)
+            for dataset_name in list(self.data):
+                renamed = self.data[dataset_name].rename(columns={old_key: new_key})
+                with self._state_lock:
+                    self.data[dataset_name] = renamed
                 
                 print(f"Renamed user column in {dataset_name}")
             
+            self._mark_data_changed()
+            
             # Save updated state
-            self._save_json_records()
+            self._save_snapshot()
             self._save_state()
             
         except Exception as e:
             raise Exception(f"Error renaming user column: {str(e)}")
 
 
-    def _save_json_records(self) -> None:
+    def _save_snapshot(self) -> None:
             """
-            Save processed records to JSON with enhanced metadata
+            Save processed records as a compressed NDJSON snapshot with enhanced metadata
             """
+            if self.read_only:
+                return
             if not self.data:
                 print("No data to save")
                 return
             
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            json_file_path = self.backup_file_path / f"processed_data_{timestamp}.json"
+            snapshot_path = self.backup_file_path / f"processed_data_{timestamp}{SNAPSHOT_SUFFIX}"
             
             metadata = {
                 'processed_at': timestamp,
@@ -231,18 +503,12 @@ class DataProcessor:
                 'column_mappings': self.column_mappings
             }
             
-            output_data = {
-                'metadata': metadata,
-                'data': self.data
-            }
-            
             try:
-                with json_file_path.open('w', encoding='utf-8') as f:
-                    json.dump(output_data, f, indent=4)
-                print(f"\nJSON records saved to: {json_file_path}")
+                write_snapshot(snapshot_path, metadata, self.data)
+                print(f"\nSnapshot saved to: {snapshot_path}")
                 
             except Exception as e:
-                raise Exception(f"Error saving JSON records: {str(e)}")
+                raise Exception(f"Error saving snapshot: {str(e)}")
 
     def _rename_columns(self, row: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -256,40 +522,88 @@ class DataProcessor:
         except Exception as e:
             raise Exception(f"Error renaming columns: {str(e)}")
 
-    def merge_datasets(self) -> pd.DataFrame:
-        try:
-            required_datasets = {'ACTIVITY_LOG', 'USER_LOG'}
+    def build_merged_frame(self) -> pd.DataFrame:
+        """
+        Merge activity, user and component data without touching saved state.
+        Only taking the frames holds the state lock; frames are replaced,
+        never changed in place, so the merge itself runs unlocked.
+        """
+        required_datasets = {'ACTIVITY_LOG', 'USER_LOG'}
+        
+        with self._state_lock:
             available_datasets = set(self.data.keys())
-            
             if not required_datasets.issubset(available_datasets):
                 missing = required_datasets - available_datasets
                 raise ValueError(f"Missing required datasets: {missing}")
             
-            activity_df = pd.DataFrame(self.data['ACTIVITY_LOG'])
-            user_df = pd.DataFrame(self.data['USER_LOG'])
-            component_df = pd.DataFrame(self.data['COMPONENT_CODES'])
-            
-            merged_df = pd.concat([
-                activity_df.reset_index(),
-                user_df.reset_index()
-            ], axis=1)
-            
-            merged_df = merged_df.merge(
-                component_df,
-                on='Component',
-                how='left'
-            )
+            activity_df = self.data['ACTIVITY_LOG']
+            user_df = self.data['USER_LOG']
+            component_df = self.data['COMPONENT_CODES']
+        
+        merged_df = pd.concat([
+            activity_df.reset_index(),
+            user_df.reset_index()
+        ], axis=1)
+        
+        merged_df = merged_df.merge(
+            component_df,
+            on='Component',
+            how='left'
+        )
+
+        # Remove the first column (duplicate index)
+        merged_df = merged_df.iloc[:, 2:]
+        
+        merged_df['Month'] = pd.to_datetime(merged_df['Date']).dt.strftime('%Y-%m')
+        
+        return merged_df
 
-            # Remove the first column (duplicate index)
-            merged_df = merged_df.iloc[:, 2:]
+    @synchronized
+    def merge_datasets(self) -> pd.DataFrame:
+        try:
+            merged_df = self.build_merged_frame()
             
-            merged_df['Month'] = pd.to_datetime(merged_df['Date']).dt.strftime('%Y-%m')
+            self._mark_data_changed()
+            self._update_sketches(merged_df)
+            self._save_state()
             
             return merged_df
             
         except Exception as e:
             raise Exception(f"Merge operation failed: {str(e)}")
 
+    def _update_sketches(self, merged_df: pd.DataFrame) -> None:
+        """
+        Add merged rows that are not in the engagement sketches yet. Sketches
+        can't forget rows, so if any were removed since the last merge (a
+        file replaced, components filtered) they are rebuilt from scratch.
+        """
+        hashes = RowHashIndex.hash_rows(merged_df)
+        sketched = self._sketched_rows
+        
+        if sketched is not None and np.isin(sketched, hashes).all():
+            sketches = self.sketches.copy()
+            new_rows = ~np.isin(hashes, sketched)
+        else:
+            sketches = EngagementSketches(self.sketches.precision, self.sketches.relative_accuracy)
+            new_rows = np.ones(len(hashes), dtype=bool)
+        
+        if new_rows.any():
+            sketches.update(merged_df[new_rows])
+        
+        with self._state_lock:
+            self.sketches = sketches
+            self._sketched_rows = np.unique(hashes)
+
+    def engagement_sketches(self) -> EngagementSketches:
+        """
+        Sketches of this processor's data combined with merged-in shards
+        """
+        with self._state_lock:
+            combined = self.sketches.copy()
+            combined.merge(self.shard_sketches)
+        return combined
+
     def reshape_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Reshape merged data using pivot operation with enhanced features
@@ -335,19 +649,149 @@ class DataProcessor:
         except Exception as e:
             raise Exception(f"Counting interactions failed: {str(e)}")
 
-    def get_data(self, dataset_name: str = None) -> Dict[str, List[Dict[str, Any]]]:
+    def cluster_users(self, df: pd.DataFrame, n_clusters: Optional[int] = None) -> pd.DataFrame:
+        """
+        Group users with similar component usage and persist the assignments.
+        Results are reused until the processed data or cluster count changes.
+        """
+        fit_key = f"{self._data_fingerprint()}:{n_clusters or self.user_clusterer.n_clusters}"
+        return self.user_clusterer.fit_or_load(df, n_clusters, fit_key)
+
+    def _component_matrix(self, df: pd.DataFrame) -> Tuple[pd.Index, np.ndarray, sparse.csr_matrix]:
+        """
+        Build a sparse (user, month) x component count matrix from reshaped,
+        interaction or merged data. Also returns the month of each row.
+        """
+        if 'Total_Interactions' in df.columns:
+            # Reshaped data is already one row per user and month
+            components = pd.Index([col for col in df.columns
+                                   if col not in ['User_ID', 'Month', 'Total_Interactions']])
+            matrix = sparse.csr_matrix(df[components].to_numpy(dtype=np.float64))
+            return components, df['Month'].to_numpy(), matrix
+        
+        row_codes, row_keys = pd.factorize(
+            pd.MultiIndex.from_arrays([df['User_ID'], df['Month']])
+        )
+        component_codes, components = pd.factorize(df['Component'], sort=True)
+        
+        if 'Interaction_Count' in df.columns:
+            weights = df['Interaction_Count'].to_numpy(dtype=np.float64)
+        else:
+            weights = np.ones(len(df), dtype=np.float64)
+        
+        matrix = sparse.coo_matrix(
+            (weights, (row_codes, component_codes)),
+            shape=(len(row_keys), len(components))
+        ).tocsr()
+        
+        return pd.Index(components), row_keys.get_level_values(1).to_numpy(), matrix
+
+    def _correlate(self, matrix: sparse.csr_matrix, components: pd.Index) -> Dict[str, pd.DataFrame]:
+        """
+        Pearson correlation and co-usage counts between component columns
+        """
+        n = matrix.shape[0]
+        
+        # Co-usage: number of user-months that touched both components
+        used = (matrix > 0).astype(np.float64)
+        co_usage = np.asarray((used.T @ used).todense())
+        
+        # Covariance from the Gram matrix, so the data is never densified
+        gram = np.asarray((matrix.T @ matrix).todense())
+        means = np.asarray(matrix.mean(axis=0)).ravel()
+        cov = (gram - n * np.outer(means, means)) / max(n - 1, 1)
+        std = np.sqrt(np.clip(np.diag(cov), 0, None))
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = cov / np.outer(std, std)
+        corr[~np.isfinite(corr)] = 0.0
+        np.fill_diagonal(corr, np.where(std > 0, 1.0, 0.0))
+        
+        return {
+            'correlation': pd.DataFrame(corr, index=components, columns=components),
+            'co_usage': pd.DataFrame(co_usage.astype(int), index=components, columns=components)
+        }
+
+    def component_correlations(self, df: pd.DataFrame, by_month: bool = False) -> Dict[str, Any]:
+        """
+        Compute component-by-component correlation and co-usage counts.
+        With by_month=True the result is keyed by month instead.
+        Results are cached until the underlying data changes.
+        """
+        try:
+            cache_key = (id(df), by_month)
+            cached = self._correlation_cache.get(cache_key)
+            if cached is not None and cached[0]() is df:
+                return cached[1]
+            
+            components, months, matrix = self._component_matrix(df)
+            
+            if by_month:
+                result = {}
+                for month in sorted(pd.unique(months)):
+                    rows = np.flatnonzero(months == month)
+                    result[month] = self._correlate(matrix[rows], components)
+            else:
+                result = self._correlate(matrix, components)
+            
+            # A weak reference guards against id() reuse without pinning the frame
+            self._correlation_cache[cache_key] = (weakref.ref(df), result)
+            return result
+            
+        except Exception as e:
+            raise Exception(f"Component correlation failed: {str(e)}")
+
+    @synchronized
+    def merge_sketches(self, other: EngagementSketches) -> None:
+        """
+        Combine sketches built from another file or shard into this state.
+        They are kept apart from this processor's own sketches, so merging
+        datasets again never drops them.
+        """
+        with self._state_lock:
+            self.shard_sketches.merge(other)
+        self._mark_data_changed()
+        self._save_state()
+
+    def start_watch(self, input_dir: str, poll_interval: float = 5.0, settle_seconds: float = 10.0,
+                    on_update: Optional[Callable[[Dict[str, Any]], None]] = None) -> IngestionScheduler:
+        """
+        Poll a directory in the background and ingest new or changed CSV files
+        """
+        self.stop_watch()
+        self.scheduler = IngestionScheduler(
+            self, input_dir,
+            poll_interval=poll_interval,
+            settle_seconds=settle_seconds,
+            on_update=on_update
+        )
+        self.scheduler.start()
+        return self.scheduler
+
+    def stop_watch(self) -> None:
+        if self.scheduler is not None:
+            self.scheduler.stop()
+            self.scheduler = None
+
+    def get_data(self, dataset_name: str = None) -> Dict[str, pd.DataFrame]:
         if dataset_name:
-            return {dataset_name: self.data.get(dataset_name, [])}
+            return {dataset_name: self.data.get(dataset_name, pd.DataFrame())}
         return self.data
 
     def get_state_summary(self) -> Dict[str, Any]:
-        return {
-            'processed_files': len(self.processed_files),
-            'total_records': sum(len(records) for records in self.data.values()),
-            'datasets': list(self.data.keys()),
-            'last_updated': self.stats.get('last_updated', 'Never')
-        }
+        # Only the state lock, so a running merge or ingestion doesn't block this
+        with self._state_lock:
+            sketches = self.engagement_sketches()
+            return {
+                'processed_files': len(self.processed_files),
+                # Row counts are kept as frames are stored, so nothing is rehydrated
+                'total_records': sum(self.data.rows.values()),
+                'datasets': list(self.data.keys()),
+                'last_updated': self.stats.get('last_updated', 'Never'),
+                'engagement': sketches.summary() if sketches.users else None
+            }
 
+    @synchronized
     def clear_state(self) -> None:
         self._initialize_new_state()
         print("Application state cleared")
\ No newline at end of file
@@ -8,19 +8,25 @@ from typing import List, Dict, Any, Optional
 from pathlib import Path
 import json
 from data_storage import DataProcessor
+from memory_governor import MemoryGovernor, governed_frame
+from snapshot import load_snapshot, SNAPSHOT_SUFFIX
 
 class DataAnalysisGUI:
-    def __init__(self, root):
+    # Intermediate frames live in the memory governor and may be spilled to disk
+    df = governed_frame('df')
+    merged_df = governed_frame('merged_df')
+    reshaped_df = governed_frame('reshaped_df')
+    interaction_df = governed_frame('interaction_df')
+    
+    def __init__(self, root, memory_budget_mb: float = 1024):
         self.root = root
         self.root.title("Educational Data Analysis Tool")
         self.root.geometry("1400x900")
         self.loaded_files = None
-        self.data_processor = DataProcessor("files")
+        self.memory = MemoryGovernor(Path("files") / "spill", memory_budget_mb)
+        # Processed datasets share the budget with the frames below
+        self.data_processor = DataProcessor("files", memory=self.memory)
         self.current_dataset = None
-        self.df = None
-        self.merged_df: Optional[pd.DataFrame] = None
-        self.reshaped_df: Optional[pd.DataFrame] = None
-        self.interaction_df: Optional[pd.DataFrame] = None
         
         self.root.columnconfigure(0, weight=1)
         self.root.rowconfigure(0, weight=1)
@@ -65,9 +71,13 @@ class DataAnalysisGUI:
         
         ttk.Button(load_frame, text="Load CSV Files", 
                   command=self.load_csv_files).grid(row=0, column=0, padx=5, pady=5, sticky='ew')
-        ttk.Button(load_frame, text="Load Processed JSON", 
+        ttk.Button(load_frame, text="Load Processed Data", 
                   command=self.load_json_data).grid(row=1, column=0, padx=5, pady=5, sticky='ew')
         
+        self.watch_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(load_frame, text="Watch datasets Folder", variable=self.watch_var,
+                       command=self.toggle_watch).grid(row=2, column=0, padx=5, pady=5, sticky='w')
+        
     def setup_data_processing(self):
         """Set up the data processing section with all processing steps"""
         process_frame = ttk.LabelFrame(self.control_frame, text="2. Data Processing")
@@ -110,7 +120,9 @@ class DataAnalysisGUI:
             ("User Timeline", "user_timeline"),
             ("Component Distribution", "component_dist"),
             ("Monthly Trends", "monthly_trends"),
-            ("User Activity Patterns", "user_patterns")
+            ("User Activity Patterns", "user_patterns"),
+            ("Component Correlations", "component_corr"),
+            ("Usage Pattern Clusters", "usage_clusters")
         ]
         
         for i, (text, value) in enumerate(options):
@@ -199,10 +211,11 @@ class DataAnalysisGUI:
         
     def update_raw_data_view(self):
         try:
-            if not self.df is None:
+            df = self.df
+            if not df is None:
                 self.raw_data_tree.delete(*self.raw_data_tree.get_children())
                 
-                columns = list(self.df.columns)
+                columns = list(df.columns)
                 self.raw_data_tree["columns"] = columns
                 
                 self.raw_data_tree.column("#0", width=0, stretch=tk.NO)
@@ -210,23 +223,26 @@ class DataAnalysisGUI:
                     self.raw_data_tree.column(col, anchor=tk.W, width=100)
                     self.raw_data_tree.heading(col, text=col, anchor=tk.W)
                 
-                for idx, row in self.df.iterrows():
+                for idx, row in df.iterrows():
                     self.raw_data_tree.insert("", tk.END, values=list(row))
                     
         except Exception as e:
             self.update_status("Failed to update raw data view", error=True)
             messagebox.showerror("Error", str(e))
             
-    def update_processed_data_view(self):
+    def update_processed_data_view(self, *names: str):
+        """Refresh the given result views, or all of them if none are named"""
         try:
-            if self.merged_df is not None:
-                self.update_treeview(self.merged_tree, self.merged_df)
-                
-            if self.reshaped_df is not None:
-                self.update_treeview(self.reshaped_tree, self.reshaped_df)
-                
-            if self.interaction_df is not None:
-                self.update_treeview(self.interaction_tree, self.interaction_df)
+            views = {
+                'merged_df': self.merged_tree,
+                'reshaped_df': self.reshaped_tree,
+                'interaction_df': self.interaction_tree
+            }
+            for name in names or views:
+                # Only rehydrate frames whose view actually needs refreshing
+                df = getattr(self, name)
+                if df is not None:
+                    self.update_treeview(views[name], df)
                 
         except Exception as e:
             self.update_status("Failed to update processed data view", error=True)
@@ -247,7 +263,7 @@ class DataAnalysisGUI:
             tree.insert("", tk.END, values=list(row))
             
     def load_csv_files(self):
-        """Load CSV files and display in raw data tab without processing"""
+        """Load CSV files and display a preview in raw data tab without processing"""
         try:
             files = filedialog.askopenfilenames(
                 title="Select CSV Files",
@@ -260,44 +276,89 @@ class DataAnalysisGUI:
             # Store file paths for later processing
             self.loaded_files = files
             
-            # Read and display CSV files
+            # Preview a head sample of each file; full parsing happens once in processing
             dfs = []
+            total_rows = 0
             for file in files:
-                df = pd.read_csv(file)
-                df['Source'] = Path(file).stem
+                df, row_count = self.data_processor.preview_csv(file)
+                df = df.assign(Source=Path(file).stem)
                 dfs.append(df)
+                total_rows += row_count
             
             self.df = pd.concat(dfs, ignore_index=True)
             self.update_raw_data_view()
-            self.update_status(f"Loaded {len(files)} CSV files successfully")
+            self.update_status(f"Loaded {len(files)} CSV files ({total_rows} rows) successfully")
             messagebox.showinfo("Success", f"Successfully loaded {len(files)} CSV files!")
             
         except Exception as e:
             self.update_status("Failed to load CSV files", error=True)
             messagebox.showerror("Error", f"Error loading CSV files: {str(e)}")   
 
+    def toggle_watch(self):
+        """Start or stop automatic ingestion of CSV files dropped in datasets/"""
+        try:
+            if self.watch_var.get():
+                self.data_processor.start_watch(
+                    "datasets",
+                    on_update=lambda result: self.root.after(0, self._on_watch_update, result)
+                )
+                self.update_status("Watching datasets folder")
+            else:
+                self.data_processor.stop_watch()
+                self.update_status("Stopped watching datasets folder")
+                
+        except Exception as e:
+            self.watch_var.set(False)
+            self.update_status("Failed to watch datasets folder", error=True)
+            messagebox.showerror("Error", str(e))
+            
+    def _on_watch_update(self, result: Dict[str, Any]):
+        """Apply results of a scheduled ingestion run on the Tk thread"""
+        if 'error' in result:
+            self.refresh_state()
+            self.update_status(f"Scheduled ingestion failed, will retry: {result['error']}", error=True)
+            return
+        refreshed = [name for name in ('merged_df', 'reshaped_df', 'interaction_df') if name in result]
+        for name in refreshed:
+            setattr(self, name, result[name])
+        if refreshed:
+            self.update_processed_data_view(*refreshed)
+        self.refresh_state()
+        self.update_status(f"Ingested {len(result['files'])} new files from datasets folder")
+        
     def load_json_data(self):
         try:
             file = filedialog.askopenfilename(
-                title="Select JSON File",
-                filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+                title="Select Processed Data File",
+                filetypes=[("Snapshot files", f"*{SNAPSHOT_SUFFIX}"),
+                           ("Legacy JSON files", "*.json"),
+                           ("All files", "*.*")]
             )
             
             if not file:
                 return
                 
-            with open(file, 'r') as f:
-                data = json.load(f)
-                self.current_dataset = data['data']
-                self.prepare_dataframe()
-                self.update_raw_data_view()
+            if Path(file).suffix == SNAPSHOT_SUFFIX:
+                # Snapshots stream straight into frames, no records in between
+                self.current_dataset = None
+                frames = load_snapshot(Path(file))
+                self.df = pd.concat(
+                    [df.assign(Source=name) for name, df in frames.items()],
+                    ignore_index=True
+                )
+            else:
+                with open(file, 'r') as f:
+                    data = json.load(f)
+                    self.current_dataset = data['data']
+                    self.prepare_dataframe()
+            self.update_raw_data_view()
                 
-            self.update_status("JSON data loaded successfully")
-            messagebox.showinfo("Success", "JSON data loaded successfully!")
+            self.update_status("Processed data loaded successfully")
+            messagebox.showinfo("Success", "Processed data loaded successfully!")
             
         except Exception as e:
-            self.update_status("Failed to load JSON data", error=True)
-            messagebox.showerror("Error", f"Error loading JSON data: {str(e)}")
+            self.update_status("Failed to load processed data", error=True)
+            messagebox.showerror("Error", f"Error loading processed data: {str(e)}")
             
     def prepare_dataframe(self):
         if not self.current_dataset:
@@ -317,7 +378,7 @@ class DataAnalysisGUI:
                 raise ValueError("Please load data files first!")
             
             self.merged_df = self.data_processor.merge_datasets()
-            self.update_processed_data_view()
+            self.update_processed_data_view('merged_df')
             self.notebook.select(1)  # Switch to Processed Data tab
             self.update_status(f"Merged {len(self.merged_df)} records successfully")
             messagebox.showinfo("Success", f"Merged {len(self.merged_df)} records successfully!")
@@ -332,7 +393,7 @@ class DataAnalysisGUI:
                 raise ValueError("Please merge datasets first!")
             
             self.reshaped_df = self.data_processor.reshape_data(self.merged_df)
-            self.update_processed_data_view()
+            self.update_processed_data_view('reshaped_df')
             self.notebook.select(1)  # Switch to Processed Data tab
             self.processed_notebook.select(1)  # Switch to Reshaped Data tab
             self.update_status("Data reshaped successfully")
@@ -348,7 +409,7 @@ class DataAnalysisGUI:
                 raise ValueError("Please merge datasets first!")
             
             self.interaction_df = self.data_processor.count_interactions(self.merged_df)
-            self.update_processed_data_view()
+            self.update_processed_data_view('interaction_df')
             self.notebook.select(3)  # Switch to Interaction Counts tab
             self.update_status("Interaction counts generated successfully")
             messagebox.showinfo("Success", "Interaction counts generated successfully!")
@@ -420,6 +481,10 @@ class DataAnalysisGUI:
                 self._plot_monthly_trends()
             elif viz_type == "user_patterns":
                 self._plot_user_patterns()
+            elif viz_type == "component_corr":
+                self._plot_component_correlations()
+            elif viz_type == "usage_clusters":
+                self._plot_usage_clusters()
                 
             plt.tight_layout()
             self.canvas.draw()
@@ -463,9 +528,30 @@ class DataAnalysisGUI:
         plt.xticks(rotation=45)
         
     def _plot_user_patterns(self):
-        patterns = self.merged_df.groupby(['User_ID', 'Component']).size().unstack(fill_value=0)
-        sns.clustermap(patterns, cmap='viridis')
-        self.ax.set_title('User Activity Patterns')
+        self.data_processor.cluster_users(self.merged_df)
+        clusterer = self.data_processor.user_clusterer
+        
+        labels = [f"Cluster {i} (n={n})" for i, n in clusterer.cluster_sizes.items()]
+        sns.heatmap(clusterer.profiles, cmap='viridis', ax=self.ax, yticklabels=labels)
+        self.ax.set_title('User Activity Patterns (mean interactions per cluster)')
+        
+    def _plot_component_correlations(self):
+        source = self.reshaped_df if self.reshaped_df is not None else self.merged_df
+        corr = self.data_processor.component_correlations(source)['correlation']
+        
+        sns.heatmap(corr, cmap='coolwarm', vmin=-1, vmax=1, center=0, ax=self.ax)
+        self.ax.set_title('Component Correlations')
+        
+    def _plot_usage_clusters(self):
+        self.data_processor.cluster_users(self.merged_df)
+        summary = self.data_processor.user_clusterer.get_cluster_summary()
+        
+        summary['Users'].plot(kind='bar', ax=self.ax)
+        for i, (users, component) in enumerate(zip(summary['Users'], summary['Top_Component'])):
+            self.ax.annotate(component, (i, users), ha='center', va='bottom')
+        self.ax.set_xlabel('Cluster')
+        self.ax.set_ylabel('Users')
+        self.ax.set_title('Usage Pattern Clusters')
         
     def save_state(self):
         try:
@@ -498,6 +584,15 @@ class DataAnalysisGUI:
                 f"Datasets: {', '.join(summary['datasets'])}\n"
                 f"Last Updated: {summary['last_updated']}"
             )
+            engagement = summary['engagement']
+            if engagement:
+                info_text += f"\nActive Users (est.): {engagement['distinct_users']}"
+                # Missing from state saved before per-user totals were sketched
+                if engagement['median_user_interactions'] is not None:
+                    info_text += (
+                        f"\nMedian Interactions per User: "
+                        f"{engagement['median_user_interactions']:.1f}"
+                    )
             self.state_info_var.set(info_text)
             self.update_status("State refreshed")
         except Exception as e:
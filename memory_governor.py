@@ -0,0 +1,260 @@
+import json
+import shutil
+import threading
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Dict, List, Any, Optional, Iterator
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+class MemoryGovernor:
+    def __init__(self, spill_path: str, memory_budget_mb: float = 1024):
+        self.spill_path = Path(spill_path)
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        # Most recently used frames are kept at the end
+        self.frames: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+        self.footprints: Dict[str, int] = {}
+        self.spilled: Dict[str, Path] = {}
+        self._spill_count = 0
+        # Frames are put and read from both the Tk and the scheduler thread
+        self._lock = threading.RLock()
+        self._ensure_spill_path()
+
+    def _ensure_spill_path(self) -> None:
+        # Spill files from a previous session are never reused
+        shutil.rmtree(self.spill_path, ignore_errors=True)
+        self.spill_path.mkdir(parents=True, exist_ok=True)
+
+    def _footprint(self, df: pd.DataFrame) -> int:
+        return int(df.memory_usage(index=True, deep=True).sum())
+
+    def memory_in_use(self) -> int:
+        return sum(self.footprints[name] for name in self.frames)
+
+    def put(self, name: str, df: Optional[pd.DataFrame]) -> None:
+        """
+        Track a frame under a name, spilling older frames if over budget
+        """
+        with self._lock:
+            self.drop(name)
+            if df is None:
+                return
+
+            self.frames[name] = df
+            self.footprints[name] = self._footprint(df)
+            self._enforce_budget(keep=name)
+
+    def get(self, name: str) -> Optional[pd.DataFrame]:
+        """
+        Return a tracked frame, rehydrating it from disk if it was spilled
+        """
+        with self._lock:
+            if name in self.frames:
+                self.frames.move_to_end(name)
+                return self.frames[name]
+
+            if name not in self.spilled:
+                return None
+
+            df = self._load_spilled(name)
+            # Mapped files may stay locked until the frame is released (Windows)
+            shutil.rmtree(self.spilled.pop(name), ignore_errors=True)
+            self.frames[name] = df
+            self._enforce_budget(keep=name)
+            return df
+
+    def drop(self, name: str) -> None:
+        with self._lock:
+            self.frames.pop(name, None)
+            self.footprints.pop(name, None)
+            spill_dir = self.spilled.pop(name, None)
+            if spill_dir is not None:
+                shutil.rmtree(spill_dir, ignore_errors=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            for name in list(self.footprints):
+                self.drop(name)
+
+    def get_usage(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'budget_bytes': self.memory_budget,
+                'in_memory_bytes': self.memory_in_use(),
+                'in_memory': list(self.frames),
+                'spilled': list(self.spilled)
+            }
+
+    def _enforce_budget(self, keep: str) -> None:
+        """
+        Spill least recently used frames until the budget is respected.
+        The frame currently being used is never spilled.
+        """
+        for name in list(self.frames):
+            if self.memory_in_use() <= self.memory_budget:
+                break
+            if name == keep:
+                continue
+            try:
+                self._spill(name)
+            except Exception as e:
+                # The frame simply stays in memory; assigning it must not fail
+                print(str(e))
+
+    def _spill(self, name: str) -> None:
+        """
+        Write a frame to one .npy file per column and release it from memory.
+        Text and nullable columns are stored as integer codes plus their
+        unique values so every column can be memory-mapped on reload.
+        """
+        spill_dir = None
+        try:
+            df = self.frames[name]
+            # A fresh directory per spill, as earlier files may still be mapped
+            self._spill_count += 1
+            spill_dir = self.spill_path / f"{name}_{self._spill_count}"
+            spill_dir.mkdir(parents=True)
+            self._write_spill(df, spill_dir)
+
+            del self.frames[name]
+            self.spilled[name] = spill_dir
+            print(f"Spilled {name} to {spill_dir}")
+
+        except Exception as e:
+            if spill_dir is not None:
+                shutil.rmtree(spill_dir, ignore_errors=True)
+            raise Exception(f"Error spilling {name} to disk: {str(e)}")
+
+    def _write_spill(self, df: pd.DataFrame, spill_dir: Path) -> None:
+        """
+        One .npy file per column plus a meta.json describing how to rebuild the frame
+        """
+        index_name = df.index.name
+        if not isinstance(df.index, pd.RangeIndex):
+            df = df.reset_index(names='__index__')
+            has_index = True
+        else:
+            has_index = False
+
+        columns = []
+        # Positional access, as column labels may repeat
+        for i, col in enumerate(df.columns):
+            series = df.iloc[:, i]
+            entry = {'name': col, 'dtype': str(series.dtype)}
+
+            if isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biufcmM':
+                np.save(spill_dir / f"col_{i}.npy", series.to_numpy())
+                entry['encoding'] = 'plain'
+            else:
+                codes, uniques = pd.factorize(series)
+                np.save(spill_dir / f"col_{i}.npy", codes)
+                np.save(spill_dir / f"col_{i}_uniques.npy",
+                        np.asarray(uniques, dtype=object), allow_pickle=True)
+                entry['encoding'] = 'codes'
+
+            columns.append(entry)
+
+        meta = {
+            'columns': columns,
+            'has_index': has_index,
+            'index_name': index_name,
+            'columns_name': df.columns.name,
+            'rows': len(df)
+        }
+        with (spill_dir / "meta.json").open('w', encoding='utf-8') as f:
+            json.dump(meta, f, default=str)
+
+    def _load_spilled(self, name: str) -> pd.DataFrame:
+        try:
+            spill_dir = self.spilled[name]
+            with (spill_dir / "meta.json").open('r', encoding='utf-8') as f:
+                meta = json.load(f)
+
+            # Keyed by position so repeated column labels survive the round trip
+            data = {}
+            for i, entry in enumerate(meta['columns']):
+                values = np.load(spill_dir / f"col_{i}.npy", mmap_mode='c')
+
+                if entry['encoding'] == 'codes':
+                    uniques = np.load(spill_dir / f"col_{i}_uniques.npy", allow_pickle=True)
+                    values = np.asarray(values)
+                    decoded = np.empty(len(values), dtype=object)
+                    decoded[:] = None
+                    present = values >= 0
+                    decoded[present] = uniques[values[present]]
+                    if entry['dtype'] == 'object':
+                        data[i] = pd.Series(decoded, dtype=object)
+                    else:
+                        data[i] = pd.Series(decoded).astype(entry['dtype'])
+                else:
+                    data[i] = pd.Series(values, copy=False)
+
+            df = pd.DataFrame(data, copy=False)
+
+            if meta['has_index']:
+                df = df.set_index(0)
+                df.index.name = meta['index_name']
+                names = [entry['name'] for entry in meta['columns'][1:]]
+            else:
+                names = [entry['name'] for entry in meta['columns']]
+            df.columns = pd.Index(names, name=meta['columns_name'])
+
+            print(f"Rehydrated {name} from {spill_dir}")
+            return df
+
+        except Exception as e:
+            raise Exception(f"Error loading {name} from disk: {str(e)}")
+
+
+def governed_frame(name: str) -> property:
+    """
+    Attribute backed by the owner's MemoryGovernor (self.memory)
+    """
+    def getter(self) -> Optional[pd.DataFrame]:
+        return self.memory.get(name)
+
+    def setter(self, df: Optional[pd.DataFrame]) -> None:
+        self.memory.put(name, df)
+
+    return property(getter, setter)
+
+
+class GovernedFrames(MutableMapping):
+    """
+    Named frames kept in a MemoryGovernor, so they share its budget with
+    every other governed frame. Without a governor frames stay in memory.
+    """
+    def __init__(self, memory: Optional[MemoryGovernor] = None, prefix: str = ""):
+        self.memory = memory
+        self.prefix = prefix
+        # Row counts double as the ordered set of names
+        self.rows: Dict[str, int] = {}
+        self._frames: Dict[str, pd.DataFrame] = {}
+
+    def __getitem__(self, name: str) -> pd.DataFrame:
+        if name not in self.rows:
+            raise KeyError(name)
+        if self.memory is None:
+            return self._frames[name]
+        return self.memory.get(self.prefix + name)
+
+    def __setitem__(self, name: str, df: pd.DataFrame) -> None:
+        self.rows[name] = len(df)
+        if self.memory is None:
+            self._frames[name] = df
+        else:
+            self.memory.put(self.prefix + name, df)
+
+    def __delitem__(self, name: str) -> None:
+        del self.rows[name]
+        if self.memory is None:
+            del self._frames[name]
+        else:
+            self.memory.drop(self.prefix + name)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self.rows))
+
+    def __len__(self) -> int:
+        return len(self.rows)
@@ -0,0 +1,266 @@
+"""
+Local read-only HTTP service over a DataProcessor's processed results.
+
+    python query_service.py --backup files --port 8765
+
+Endpoints (GET):
+    /summary                      state summary and engagement estimates
+    /users/<User_ID>              interaction counts per component and month
+    /components                   interactions and distinct users per component
+    /trends/monthly               interactions per month
+    /charts/<name>.png            monthly_trends or component_dist
+
+Run standalone, the service reloads application_state.json whenever the GUI
+saves it, so responses follow the GUI's processed data.
+"""
+import argparse
+import asyncio
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
+from urllib.parse import urlsplit, unquote
+import pandas as pd
+from matplotlib.figure import Figure
+from data_storage import DataProcessor
+
+Response = Tuple[int, str, bytes]
+
+class QueryService:
+    def __init__(self, processor: DataProcessor, host: str = "127.0.0.1", port: int = 8765,
+                 max_workers: int = 4, follow_state_file: bool = False):
+        self.processor = processor
+        self.host = host
+        self.port = port
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.cache_version: Optional[int] = None
+        self.response_cache: Dict[str, Response] = {}
+        # One shared computation per dataset version
+        self._frames_version: Optional[int] = None
+        self._frames_task: Optional[asyncio.Future] = None
+        # When running apart from the GUI, pick up the state it saves
+        self.follow_state_file = follow_state_file
+        # Unknown until the first request reloads it, in case the processor
+        # met a half-written file when it was created
+        self._state_signature: Optional[Tuple[int, int]] = None
+        self.charts = {
+            'monthly_trends': self._render_monthly_trends,
+            'component_dist': self._render_component_distribution
+        }
+
+    def _stat_state_file(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.processor.state_file.stat()
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    async def _refresh_state(self) -> None:
+        """
+        Reload the processor if its state file changed on disk, which bumps
+        data_version and so invalidates cached responses and frames
+        """
+        if not self.follow_state_file:
+            return
+
+        signature = self._stat_state_file()
+        if signature is None or signature == self._state_signature:
+            return
+
+        loop = asyncio.get_running_loop()
+        if await loop.run_in_executor(self.executor, self.processor.reload_state):
+            self._state_signature = signature
+
+    def _check_version(self) -> int:
+        """
+        Drop cached responses once the processor's data has changed
+        """
+        version = self.processor.data_version
+        if version != self.cache_version:
+            self.response_cache.clear()
+            self.cache_version = version
+        return version
+
+    async def _get_frames(self) -> Dict[str, pd.DataFrame]:
+        """
+        Merged and interaction frames for the current version. Concurrent
+        requests await the same computation instead of starting their own.
+        """
+        version = self.processor.data_version
+        if self._frames_task is None or self._frames_version != version:
+            loop = asyncio.get_running_loop()
+            self._frames_version = version
+            self._frames_task = loop.run_in_executor(self.executor, self._build_frames)
+
+        task = self._frames_task
+        try:
+            return await asyncio.shield(task)
+        except Exception:
+            # Let the next request retry rather than re-raise a stale failure
+            if self._frames_task is task:
+                self._frames_task = None
+            raise
+
+    def _build_frames(self) -> Dict[str, pd.DataFrame]:
+        merged_df = self.processor.build_merged_frame()
+        return {
+            'merged_df': merged_df,
+            'interaction_df': self.processor.count_interactions(merged_df)
+        }
+
+    def _json(self, payload: Any, status: int = 200) -> Response:
+        return status, "application/json", json.dumps(payload, default=str).encode('utf-8')
+
+    async def handle_path(self, path: str) -> Response:
+        await self._refresh_state()
+        version = self._check_version()
+        if path in self.response_cache:
+            return self.response_cache[path]
+
+        parts = [unquote(part) for part in path.strip('/').split('/') if part]
+        loop = asyncio.get_running_loop()
+
+        if parts == ['summary']:
+            summary = await loop.run_in_executor(self.executor, self.processor.get_state_summary)
+            response = self._json(summary)
+        elif len(parts) == 2 and parts[0] == 'users':
+            frames = await self._get_frames()
+            response = await loop.run_in_executor(self.executor, self._user_interactions,
+                                                  frames['interaction_df'], parts[1])
+        elif parts == ['components']:
+            frames = await self._get_frames()
+            response = await loop.run_in_executor(self.executor, self._component_interactions,
+                                                  frames['interaction_df'])
+        elif parts == ['trends', 'monthly']:
+            frames = await self._get_frames()
+            response = await loop.run_in_executor(self.executor, self._monthly_interactions,
+                                                  frames['merged_df'])
+        elif len(parts) == 2 and parts[0] == 'charts' and parts[1].endswith('.png') \
+                and parts[1][:-4] in self.charts:
+            frames = await self._get_frames()
+            render = self.charts[parts[1][:-4]]
+            body = await loop.run_in_executor(self.executor, render, frames['merged_df'])
+            response = (200, "image/png", body)
+        else:
+            return self._json({'error': f"Unknown endpoint: {path}"}, status=404)
+
+        # Only cache if the data didn't change while this was computed
+        if self.processor.data_version == version:
+            self.response_cache[path] = response
+        return response
+
+    def _user_interactions(self, interaction_df: pd.DataFrame, user_id: str) -> Response:
+        rows = interaction_df[interaction_df['User_ID'].astype(str) == user_id]
+        if rows.empty:
+            return self._json({'error': f"Unknown user: {user_id}"}, status=404)
+
+        by_month: Dict[str, Dict[str, int]] = {}
+        for row in rows.itertuples(index=False):
+            by_month.setdefault(row.Month, {})[row.Component] = int(row.Interaction_Count)
+
+        totals = rows.groupby('Component')['Interaction_Count'].sum()
+        return self._json({
+            'User_ID': user_id,
+            'components': {component: int(count) for component, count in totals.items()},
+            'months': by_month
+        })
+
+    def _component_interactions(self, interaction_df: pd.DataFrame) -> Response:
+        grouped = interaction_df.groupby('Component').agg(
+            interactions=('Interaction_Count', 'sum'),
+            users=('User_ID', 'nunique')
+        )
+        return self._json({
+            component: {'interactions': int(row.interactions), 'users': int(row.users)}
+            for component, row in grouped.iterrows()
+        })
+
+    def _monthly_interactions(self, merged_df: pd.DataFrame) -> Response:
+        monthly = merged_df.groupby('Month').size()
+        return self._json({month: int(count) for month, count in monthly.items()})
+
+    def _render_png(self, fig: Figure) -> bytes:
+        buffer = io.BytesIO()
+        fig.tight_layout()
+        fig.savefig(buffer, format='png')
+        return buffer.getvalue()
+
+    def _render_monthly_trends(self, merged_df: pd.DataFrame) -> bytes:
+        # Figure objects are used directly as pyplot is not thread-safe
+        fig = Figure(figsize=(10, 6))
+        ax = fig.add_subplot()
+        merged_df.groupby('Month').size().plot(kind='line', marker='o', ax=ax)
+        ax.set_title('Monthly Activity Trends')
+        ax.tick_params(axis='x', rotation=45)
+        return self._render_png(fig)
+
+    def _render_component_distribution(self, merged_df: pd.DataFrame) -> bytes:
+        fig = Figure(figsize=(8, 8))
+        ax = fig.add_subplot()
+        merged_df['Component'].value_counts().plot(kind='pie', ax=ax, autopct='%1.1f%%')
+        ax.set_title('Component Usage Distribution')
+        return self._render_png(fig)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader,
+                                 writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await reader.readline()
+            # Headers are read and ignored
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+
+            parts = request_line.decode('latin-1').split()
+            if len(parts) < 2:
+                status, content_type, body = self._json({'error': "Bad request"}, status=400)
+            elif parts[0] not in ('GET', 'HEAD'):
+                status, content_type, body = self._json({'error': "Read-only service"}, status=405)
+            else:
+                try:
+                    status, content_type, body = await self.handle_path(urlsplit(parts[1]).path)
+                except Exception as e:
+                    status, content_type, body = self._json({'error': str(e)}, status=500)
+
+            reason = {200: "OK", 400: "Bad Request", 404: "Not Found",
+                      405: "Method Not Allowed", 500: "Internal Server Error"}[status]
+            headers = (
+                f"HTTP/1.1 {status} {reason}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"X-Data-Version: {self.cache_version}\r\n"
+                f"Connection: close\r\n\r\n"
+            )
+            writer.write(headers.encode('latin-1'))
+            if len(parts) < 1 or parts[0] != 'HEAD':
+                writer.write(body)
+            await writer.drain()
+
+        except Exception as e:
+            print(f"Error handling request: {str(e)}")
+        finally:
+            writer.close()
+
+    async def serve(self) -> None:
+        server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        print(f"Query service listening on http://{self.host}:{self.port}")
+        async with server:
+            await server.serve_forever()
+
+    def run(self) -> None:
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            print("Query service stopped")
+        finally:
+            self.executor.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Read-only query service over processed data")
+    parser.add_argument("--backup", default="files", help="DataProcessor backup folder")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    # Standalone, so follow the state file the GUI keeps saving but never write it
+    QueryService(DataProcessor(args.backup, read_only=True), args.host, args.port,
+                 follow_state_file=True).run()
@@ -0,0 +1,98 @@
+from typing import Dict, List, Any, Tuple, Iterable, Optional
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+class RowHashIndex:
+    """
+    Persistent index of 64-bit row hashes, kept per source file so that
+    duplicates can be found across files and ingestion runs without
+    reloading earlier data. Re-processing a file replaces its own hashes
+    instead of matching against them. Sources are keyed by resolved path.
+    """
+    def __init__(self, index_path: str):
+        self.index_file = Path(index_path) / "row_hash_index.npz"
+        self.hashes: Dict[str, np.ndarray] = {}
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            if self.index_file.exists():
+                with np.load(self.index_file) as stored:
+                    sources = stored['sources'].tolist()
+                    self.hashes = {
+                        str(Path(source).resolve()): stored[f"h{i}"]
+                        for i, source in enumerate(sources)
+                    }
+        except Exception as e:
+            print(f"Error loading row hash index: {str(e)}")
+            self.hashes = {}
+
+    def save(self) -> None:
+        try:
+            sources = list(self.hashes)
+            arrays = {f"h{i}": self.hashes[source] for i, source in enumerate(sources)}
+            with self.index_file.open('wb') as f:
+                np.savez(f, sources=np.array(sources, dtype=str), **arrays)
+        except Exception as e:
+            print(f"Error saving row hash index: {str(e)}")
+
+    def forget(self, source: str) -> None:
+        self.hashes.pop(str(Path(source).resolve()), None)
+
+    def clear(self) -> None:
+        self.hashes = {}
+        if self.index_file.exists():
+            self.index_file.unlink()
+
+    @staticmethod
+    def hash_rows(df: pd.DataFrame) -> np.ndarray:
+        """
+        Hash each row's values, independent of column order. The column
+        names are mixed in so only files with the same schema can collide.
+        """
+        columns = sorted(df.columns.astype(str))
+        row_hashes = pd.util.hash_pandas_object(
+            df[sorted(df.columns, key=str)], index=False
+        ).to_numpy(dtype=np.uint64)
+        schema_hash = pd.util.hash_array(np.array(["|".join(columns)], dtype=object))[0]
+        return row_hashes ^ schema_hash
+
+    def _seen_elsewhere(self, source: str, hashes: np.ndarray, store: Dict[str, np.ndarray],
+                        peers: Optional[Iterable[str]] = None) -> np.ndarray:
+        seen = np.zeros(len(hashes), dtype=bool)
+        others = store if peers is None else {
+            peer: store[peer] for peer in peers if peer in store
+        }
+        for other, known in others.items():
+            if other == source or len(known) == 0:
+                continue
+            # Stored hashes are sorted, so membership is a binary search
+            positions = np.searchsorted(known, hashes)
+            positions[positions == len(known)] = 0
+            seen |= known[positions] == hashes
+        return seen
+
+    def deduplicate(self, source: str, df: pd.DataFrame,
+                    peers: Optional[Iterable[str]] = None,
+                    staged: Optional[Dict[str, np.ndarray]] = None) -> Tuple[pd.DataFrame, int, int]:
+        """
+        Drop rows repeated within the frame or already ingested from another
+        file, and record the remaining rows under source. If peers is given,
+        only those files are checked, e.g. the files feeding the same dataset.
+        With staged, hashes are checked against and recorded in that dict
+        instead, so several files can be committed to the index together.
+        Returns the kept rows and the counts removed within / across files.
+        """
+        store = self.hashes if staged is None else staged
+        source = str(Path(source).resolve())
+        if peers is not None:
+            peers = [str(Path(peer).resolve()) for peer in peers]
+        hashes = self.hash_rows(df)
+
+        within = pd.Series(hashes).duplicated().to_numpy()
+        across = ~within & self._seen_elsewhere(source, hashes, store, peers)
+        keep = ~(within | across)
+
+        store[source] = np.sort(hashes[keep])
+        return df[keep], int(within.sum()), int(across.sum())
@@ -0,0 +1,158 @@
+import threading
+import time
+from typing import Dict, List, Any, Optional, Tuple, Callable, Set
+from pathlib import Path
+
+# Datasets that feed merge_datasets; other files don't require a re-merge
+MERGE_INPUTS = {'ACTIVITY_LOG', 'USER_LOG', 'COMPONENT_CODES'}
+
+class IngestionScheduler:
+    def __init__(self, processor, input_dir: str, poll_interval: float = 5.0,
+                 settle_seconds: float = 10.0, pattern: str = "*.csv",
+                 on_update: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.processor = processor
+        self.input_dir = Path(input_dir)
+        self.poll_interval = poll_interval
+        self.settle_seconds = settle_seconds
+        self.pattern = pattern
+        self.on_update = on_update
+        # Signatures (mtime, size) of files already ingested
+        self.known: Dict[str, Tuple[float, int]] = {}
+        # Files waiting to settle: signature and when it was last seen changing
+        self.pending: Dict[str, Tuple[Tuple[float, int], float]] = {}
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Files processed in an earlier session count as ingested as they are now
+        for path, signature in self._scan().items():
+            if self.processor.is_processed(path):
+                self.known[path] = signature
+
+    def _scan(self) -> Dict[str, Tuple[float, int]]:
+        signatures = {}
+        for path in self.input_dir.glob(self.pattern):
+            try:
+                stat = path.stat()
+                # Resolved so paths match those picked in the GUI file dialog
+                signatures[str(path.resolve())] = (stat.st_mtime, stat.st_size)
+            except OSError:
+                # File vanished between listing and stat
+                continue
+        return signatures
+
+    def poll(self, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Check the input directory once and run the pipeline if a batch is ready.
+        A file is ready once its size and mtime have not changed for
+        settle_seconds; the batch waits until every pending file is ready, so
+        a burst of exports results in a single run.
+        """
+        now = time.monotonic() if now is None else now
+        current = self._scan()
+
+        for path in list(self.pending):
+            if path not in current:
+                del self.pending[path]
+
+        for path, signature in current.items():
+            if self.known.get(path) == signature:
+                self.pending.pop(path, None)
+                continue
+            previous = self.pending.get(path)
+            if previous is None or previous[0] != signature:
+                # New or still being written: restart its quiet period
+                self.pending[path] = (signature, now)
+
+        if not self.pending:
+            return None
+
+        if any(now - since < self.settle_seconds for _, since in self.pending.values()):
+            return None
+
+        batch = {path: signature for path, (signature, _) in self.pending.items()}
+        self.pending.clear()
+        return self._run(batch, now)
+
+    def _run(self, batch: Dict[str, Tuple[float, int]], now: float) -> Dict[str, Any]:
+        """
+        Ingest a batch of files and refresh downstream results if needed.
+        Each processor step takes the processor lock on its own, so GUI
+        actions only wait for the current step rather than the whole run.
+        """
+        try:
+            result = self._run_pipeline(batch)
+        except Exception as e:
+            print(f"Scheduled ingestion failed: {str(e)}")
+            # Retry the whole batch after another quiet period
+            for path, signature in batch.items():
+                self.pending[path] = (signature, now)
+            result = {'files': [], 'datasets': set(), 'error': str(e)}
+            if self.on_update:
+                self.on_update(result)
+            return result
+
+        for path in batch:
+            if path in result['files']:
+                self.known[path] = batch[path]
+            else:
+                # Failed (e.g. still locked): retry after another quiet period
+                self.pending[path] = (batch[path], now)
+
+        if result['files'] and self.on_update:
+            self.on_update(result)
+
+        return result
+
+    def _run_pipeline(self, batch: Dict[str, Tuple[float, int]]) -> Dict[str, Any]:
+        paths = sorted(batch)
+
+        # Changed files must be processed again
+        for path in paths:
+            self.processor.forget_file(path)
+
+        self.processor.process_csv_files(*paths)
+
+        ingested = [path for path in paths if self.processor.is_processed(path)]
+        changed: Set[str] = {Path(path).stem.upper() for path in ingested}
+        result: Dict[str, Any] = {'files': ingested, 'datasets': changed}
+
+        if not ingested:
+            return result
+
+        self.processor.remove_excluded_components()
+        self.processor.rename_user_column()
+
+        if changed & MERGE_INPUTS and MERGE_INPUTS.issubset(self.processor.data):
+            merged_df = self.processor.merge_datasets()
+            result['merged_df'] = merged_df
+            result['reshaped_df'] = self.processor.reshape_data(merged_df)
+            result['interaction_df'] = self.processor.count_interactions(merged_df)
+
+        print(f"Scheduled ingestion processed {len(ingested)} files")
+
+        return result
+
+    def _loop(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Error in scheduled ingestion: {str(e)}")
+            self._stop_event.wait(self.poll_interval)
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        print(f"Watching {self.input_dir} for new CSV files")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + 1)
+            self._thread = None
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
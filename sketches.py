@@ -0,0 +1,233 @@
+import base64
+import math
+from typing import Dict, List, Any, Optional, Tuple, Iterable
+import numpy as np
+import pandas as pd
+
+class HyperLogLog:
+    """
+    Distinct-count sketch. Registers merge with an element-wise max,
+    so sketches built from different files or shards can be combined.
+    """
+    def __init__(self, precision: int = 12, registers: Optional[np.ndarray] = None):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = registers if registers is not None else np.zeros(self.size, dtype=np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if len(hashes) == 0:
+            return
+
+        width = 64 - self.precision
+        index = (hashes >> np.uint64(width)).astype(np.int64)
+        rest = hashes & np.uint64((1 << width) - 1)
+
+        # Exact bit length of the remaining bits, correcting float rounding
+        _, bit_length = np.frexp(rest.astype(np.float64))
+        too_long = (bit_length > 0) & (
+            (np.uint64(1) << (np.maximum(bit_length, 1) - 1).astype(np.uint64)) > rest
+        )
+        bit_length = bit_length - too_long
+        rank = (width - bit_length + 1).astype(np.uint8)
+
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches with different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> float:
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+
+        # Linear counting is more accurate for small cardinalities
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros > 0:
+            return m * math.log(m / zeros)
+        return float(raw)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'precision': self.precision,
+            'registers': base64.b64encode(self.registers.tobytes()).decode('ascii')
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "HyperLogLog":
+        registers = np.frombuffer(base64.b64decode(state['registers']), dtype=np.uint8).copy()
+        return cls(state['precision'], registers)
+
+
+class QuantileSketch:
+    """
+    Log-bucketed quantile sketch with a bounded relative error.
+    Bucket counts simply add up when sketches are merged.
+    """
+    def __init__(self, relative_accuracy: float = 0.01, bins: Optional[Dict[int, int]] = None):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.bins: Dict[int, int] = bins or {}
+
+    @property
+    def count(self) -> int:
+        return sum(self.bins.values())
+
+    def add_values(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        values = values[values > 0]
+        if len(values) == 0:
+            return
+
+        keys = np.ceil(np.log(values) / math.log(self.gamma)).astype(np.int64)
+        unique, counts = np.unique(keys, return_counts=True)
+        for key, count in zip(unique.tolist(), counts.tolist()):
+            self.bins[key] = self.bins.get(key, 0) + count
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+
+    def quantile(self, q: float) -> Optional[float]:
+        total = self.count
+        if total == 0:
+            return None
+
+        rank = q * (total - 1)
+        seen = 0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'bins': {str(key): count for key, count in self.bins.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "QuantileSketch":
+        bins = {int(key): count for key, count in state['bins'].items()}
+        return cls(state['relative_accuracy'], bins)
+
+
+class EngagementSketches:
+    """
+    Distinct-user and interaction sketches for each month x component, plus
+    one sketch of each user's total interactions. Counts are taken within
+    each update, so a user whose activity is split across shards contributes
+    one value per shard to the quantiles.
+    """
+    def __init__(self, precision: int = 12, relative_accuracy: float = 0.01):
+        self.precision = precision
+        self.relative_accuracy = relative_accuracy
+        self.users: Dict[Tuple[str, str], HyperLogLog] = {}
+        # Interactions per user within one month x component
+        self.interactions: Dict[Tuple[str, str], QuantileSketch] = {}
+        # Total interactions per user across all months and components
+        self.user_totals = QuantileSketch(relative_accuracy)
+
+    def update(self, df: pd.DataFrame) -> None:
+        """
+        Add the activity in a frame with User_ID, Component and Month (or Date)
+        """
+        try:
+            if 'Month' in df.columns:
+                months = df['Month'].astype(str)
+            else:
+                months = pd.to_datetime(df['Date']).dt.strftime('%Y-%m')
+
+            frame = pd.DataFrame({
+                'Month': months.to_numpy(),
+                'Component': df['Component'].astype(str).to_numpy(),
+                'User_ID': df['User_ID'].astype(str).to_numpy()
+            })
+            hashes = pd.util.hash_array(frame['User_ID'].to_numpy(dtype=object))
+
+            for key, rows in frame.groupby(['Month', 'Component']).indices.items():
+                sketch = self.users.setdefault(key, HyperLogLog(self.precision))
+                sketch.add_hashes(hashes[rows])
+
+            per_user = frame.groupby(['Month', 'Component', 'User_ID']).size()
+            for key, counts in per_user.groupby(level=['Month', 'Component']):
+                sketch = self.interactions.setdefault(key, QuantileSketch(self.relative_accuracy))
+                sketch.add_values(counts.to_numpy())
+
+            self.user_totals.add_values(frame.groupby('User_ID').size().to_numpy())
+
+        except Exception as e:
+            raise Exception(f"Error updating engagement sketches: {str(e)}")
+
+    def copy(self) -> "EngagementSketches":
+        copied = EngagementSketches(self.precision, self.relative_accuracy)
+        copied.merge(self)
+        return copied
+
+    def merge(self, other: "EngagementSketches") -> None:
+        for key, sketch in other.users.items():
+            self.users.setdefault(key, HyperLogLog(self.precision)).merge(sketch)
+        for key, sketch in other.interactions.items():
+            self.interactions.setdefault(key, QuantileSketch(self.relative_accuracy)).merge(sketch)
+        self.user_totals.merge(other.user_totals)
+
+    def _matching(self, sketches: Dict[Tuple[str, str], Any],
+                  month: Optional[str], component: Optional[str]) -> Iterable[Any]:
+        return [
+            sketch for (m, c), sketch in sketches.items()
+            if (month is None or m == month) and (component is None or c == component)
+        ]
+
+    def distinct_users(self, month: Optional[str] = None, component: Optional[str] = None) -> int:
+        combined = HyperLogLog(self.precision)
+        for sketch in self._matching(self.users, month, component):
+            combined.merge(sketch)
+        return int(round(combined.estimate()))
+
+    def interaction_quantile(self, q: float, month: Optional[str] = None,
+                             component: Optional[str] = None) -> Optional[float]:
+        combined = QuantileSketch(self.relative_accuracy)
+        for sketch in self._matching(self.interactions, month, component):
+            combined.merge(sketch)
+        return combined.quantile(q)
+
+    def months(self) -> List[str]:
+        return sorted({month for month, _ in self.users})
+
+    def components(self) -> List[str]:
+        return sorted({component for _, component in self.users})
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'distinct_users': self.distinct_users(),
+            'median_user_interactions': self.user_totals.quantile(0.5),
+            'p90_user_interactions': self.user_totals.quantile(0.9),
+            'median_component_month_interactions': self.interaction_quantile(0.5),
+            'p90_component_month_interactions': self.interaction_quantile(0.9),
+            'users_per_month': {month: self.distinct_users(month=month) for month in self.months()}
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'precision': self.precision,
+            'relative_accuracy': self.relative_accuracy,
+            'users': {f"{m}|{c}": sketch.to_dict() for (m, c), sketch in self.users.items()},
+            'interactions': {f"{m}|{c}": sketch.to_dict() for (m, c), sketch in self.interactions.items()},
+            'user_totals': self.user_totals.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "EngagementSketches":
+        sketches = cls(state.get('precision', 12), state.get('relative_accuracy', 0.01))
+        for key, value in state.get('users', {}).items():
+            sketches.users[tuple(key.split('|', 1))] = HyperLogLog.from_dict(value)
+        for key, value in state.get('interactions', {}).items():
+            sketches.interactions[tuple(key.split('|', 1))] = QuantileSketch.from_dict(value)
+        if 'user_totals' in state:
+            sketches.user_totals = QuantileSketch.from_dict(state['user_totals'])
+        return sketches
@@ -0,0 +1,154 @@
+"""
+Block-compressed NDJSON snapshots of processed data.
+
+Layout of a .snapshot file:
+    line 1   MAGIC followed by the byte offset of the header
+    blocks   zlib-compressed NDJSON, one record per line, per dataset
+    header   one JSON line with the metadata and each dataset's blocks and dtypes
+
+Missing values are written as JSON null and datetimes as ISO strings; the
+dtypes in the header restore the original column types on load.
+
+Each dataset can be read on its own by seeking to its blocks, so loading
+never needs the whole file in memory at once.
+"""
+import json
+import zlib
+from typing import Dict, List, Any, Iterator, Iterable, Optional
+from pathlib import Path
+import pandas as pd
+
+MAGIC = b"UNISNAP1"
+SNAPSHOT_SUFFIX = ".snapshot"
+_PREAMBLE_SIZE = len(MAGIC) + 1 + 20 + 1
+
+def _encode_block(block: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    Records for one block, with nulls as None and datetimes as ISO strings
+    """
+    encoded = {}
+    for col in block.columns:
+        series = block[col]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            values = series.map(lambda value: value.isoformat(), na_action='ignore')
+        else:
+            values = series.astype(object)
+        encoded[col] = values.where(series.notna(), None)
+    return pd.DataFrame(encoded, index=block.index).to_dict('records')
+
+def _restore_dtypes(df: pd.DataFrame, dtypes: Dict[str, str]) -> pd.DataFrame:
+    for col, dtype in dtypes.items():
+        if col not in df.columns:
+            continue
+        try:
+            if dtype.startswith('datetime64'):
+                df[col] = pd.to_datetime(df[col], format='ISO8601').astype(dtype)
+            else:
+                df[col] = df[col].astype(dtype)
+        except (TypeError, ValueError):
+            # e.g. nulls in a numpy integer column: keep what JSON gave us
+            pass
+    return df
+
+def write_snapshot(file_path: Path, metadata: Dict[str, Any],
+                   data: Dict[str, pd.DataFrame], block_rows: int = 10000) -> None:
+    """
+    Write datasets as compressed blocks followed by a header indexing them
+    """
+    try:
+        datasets = {}
+        with Path(file_path).open('wb') as f:
+            f.write(MAGIC + b" " + b"0" * 20 + b"\n")
+
+            for dataset_name, df in data.items():
+                blocks = []
+                # Records are only materialised one block at a time
+                for start in range(0, len(df), block_rows):
+                    chunk = _encode_block(df.iloc[start:start + block_rows])
+                    payload = "\n".join(json.dumps(record, default=str) for record in chunk)
+                    compressed = zlib.compress(payload.encode('utf-8'))
+                    blocks.append([f.tell(), len(compressed), len(chunk)])
+                    f.write(compressed)
+
+                datasets[dataset_name] = {
+                    'rows': len(df),
+                    'columns': [str(col) for col in df.columns],
+                    'dtypes': {str(col): str(dtype) for col, dtype in df.dtypes.items()},
+                    'blocks': blocks
+                }
+
+            header_offset = f.tell()
+            header = {
+                'version': 1,
+                'metadata': metadata,
+                'datasets': datasets
+            }
+            f.write(json.dumps(header, default=str).encode('utf-8'))
+
+            f.seek(len(MAGIC) + 1)
+            f.write(f"{header_offset:020d}".encode('ascii'))
+
+    except Exception as e:
+        raise Exception(f"Error writing snapshot: {str(e)}")
+
+def read_snapshot_header(file_path: Path) -> Dict[str, Any]:
+    """
+    Read only the header: metadata, dataset names, row counts and block offsets
+    """
+    try:
+        with Path(file_path).open('rb') as f:
+            preamble = f.read(_PREAMBLE_SIZE)
+            if not preamble.startswith(MAGIC):
+                raise ValueError("Not a snapshot file")
+            f.seek(int(preamble[len(MAGIC) + 1:-1]))
+            return json.loads(f.read().decode('utf-8'))
+
+    except Exception as e:
+        raise Exception(f"Error reading snapshot header: {str(e)}")
+
+def iter_snapshot_batches(file_path: Path, dataset_name: str,
+                          header: Optional[Dict[str, Any]] = None) -> Iterator[pd.DataFrame]:
+    """
+    Yield one DataFrame per compressed block of a dataset
+    """
+    header = header or read_snapshot_header(file_path)
+    if dataset_name not in header['datasets']:
+        raise ValueError(f"Dataset not in snapshot: {dataset_name}")
+
+    info = header['datasets'][dataset_name]
+    with Path(file_path).open('rb') as f:
+        for offset, length, _ in info['blocks']:
+            f.seek(offset)
+            lines = zlib.decompress(f.read(length)).decode('utf-8').split("\n")
+            batch = pd.DataFrame.from_records(
+                [json.loads(line) for line in lines],
+                columns=info['columns']
+            )
+            if 'dtypes' in info:
+                # Start from raw JSON values so nulls stay None until typed
+                batch = batch.astype(object).where(batch.notna(), None)
+            # Snapshots from before dtypes were recorded load as plain JSON values
+            yield _restore_dtypes(batch, info.get('dtypes', {}))
+
+def load_snapshot(file_path: Path, datasets: Optional[Iterable[str]] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Load some or all datasets of a snapshot as DataFrames
+    """
+    try:
+        header = read_snapshot_header(file_path)
+        names = list(datasets) if datasets is not None else list(header['datasets'])
+
+        frames = {}
+        for dataset_name in names:
+            batches = list(iter_snapshot_batches(file_path, dataset_name, header))
+            if batches:
+                frames[dataset_name] = pd.concat(batches, ignore_index=True)
+            else:
+                info = header['datasets'][dataset_name]
+                frames[dataset_name] = _restore_dtypes(pd.DataFrame(columns=info['columns']),
+                                                       info.get('dtypes', {}))
+
+        return frames
+
+    except Exception as e:
+        raise Exception(f"Error loading snapshot: {str(e)}")
@@ -0,0 +1,62 @@
+import threading
+import pandas as pd
+from data_storage import DataProcessor
+from memory_governor import MemoryGovernor
+
+def test_read_only_never_writes_over_half_written_state(tmp_path):
+    backup = tmp_path / "backup"
+    processor = DataProcessor(backup)
+    processor.data['ACTIVITY_LOG'] = pd.DataFrame({'Component': ['Quiz'] * 50})
+    processor._save_state()
+    processor.row_index.save()
+
+    state_file = backup / "application_state.json"
+    index_file = backup / "row_hash_index.npz"
+    saved = state_file.read_bytes()
+    state_file.write_bytes(saved[:500])
+
+    reader = DataProcessor(backup, read_only=True)
+    assert reader.data == {}
+    assert state_file.read_bytes() == saved[:500]
+    assert index_file.exists()
+
+    # Once the writer finishes, a reload picks the state up
+    state_file.write_bytes(saved)
+    assert reader.reload_state()
+    assert len(reader.data['ACTIVITY_LOG']) == 50
+
+def test_summary_does_not_wait_for_pipeline_lock(tmp_path):
+    processor = DataProcessor(tmp_path / "backup")
+    processor.data['ACTIVITY_LOG'] = pd.DataFrame({'Component': ['Quiz'] * 3})
+
+    # Stand in for a long merge or ingestion holding the pipeline lock
+    held = threading.Event()
+    release = threading.Event()
+
+    def long_step():
+        with processor.lock:
+            held.set()
+            release.wait(5)
+
+    worker = threading.Thread(target=long_step)
+    worker.start()
+    held.wait(5)
+    try:
+        summary = processor.get_state_summary()
+        assert summary['total_records'] == 3
+    finally:
+        release.set()
+        worker.join()
+
+def test_datasets_count_against_memory_budget(tmp_path):
+    memory = MemoryGovernor(tmp_path / "spill", memory_budget_mb=0.05)
+    processor = DataProcessor(tmp_path / "backup", memory=memory)
+    activity = pd.DataFrame({'Component': ['Quiz', 'Course'] * 5000})
+    with processor._state_lock:
+        processor.data['ACTIVITY_LOG'] = activity
+        processor.data['USER_LOG'] = activity.copy()
+
+    assert memory.get_usage()['spilled'] == ['dataset_ACTIVITY_LOG']
+    assert processor.get_state_summary()['total_records'] == 20000
+    assert memory.get_usage()['spilled'] == ['dataset_ACTIVITY_LOG']
+    pd.testing.assert_frame_equal(processor.data['ACTIVITY_LOG'], activity)
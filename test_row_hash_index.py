@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+from data_storage import DataProcessor
+from row_hash_index import RowHashIndex
+
+def write_export(path, users):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame({
+        'Date': [f"2024-01-{day:02d}" for day in range(1, len(users) + 1)],
+        'User Full Name *Anonymized': users,
+        'Component': ['Quiz'] * len(users)
+    }).to_csv(path, index=False)
+
+def test_overlapping_exports_keep_all_rows(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_export(tmp_path / "january" / "ACTIVITY_LOG.csv", ['a', 'b', 'c'])
+    write_export(tmp_path / "february" / "ACTIVITY_LOG.csv", ['a', 'b', 'c', 'd'])
+
+    processor = DataProcessor(tmp_path / "backup")
+    processor.process_csv_files("january/ACTIVITY_LOG.csv")
+    processor.process_csv_files(str(tmp_path / "february" / "ACTIVITY_LOG.csv"))
+
+    activity = processor.data['ACTIVITY_LOG']
+    assert sorted(activity['User Full Name *Anonymized']) == ['a', 'b', 'c', 'd']
+
+def test_same_file_by_relative_and_absolute_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_export(tmp_path / "ACTIVITY_LOG.csv", ['a', 'b'])
+
+    processor = DataProcessor(tmp_path / "backup")
+    processor.process_csv_files("ACTIVITY_LOG.csv")
+    processor.forget_file(str(tmp_path / "ACTIVITY_LOG.csv"))
+    processor.process_csv_files(str(tmp_path / "ACTIVITY_LOG.csv"))
+
+    assert len(processor.data['ACTIVITY_LOG']) == 2
+
+def test_changed_export_replaces_its_rows(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    first = tmp_path / "january" / "ACTIVITY_LOG.csv"
+    write_export(first, ['a', 'b'])
+    write_export(tmp_path / "february" / "ACTIVITY_LOG.csv", ['a', 'b', 'c'])
+
+    processor = DataProcessor(tmp_path / "backup")
+    processor.process_csv_files(str(first), "february/ACTIVITY_LOG.csv")
+
+    # Re-exported with one more row, as the watch folder would pick it up
+    write_export(first, ['a', 'b', 'x'])
+    processor.forget_file(str(first))
+    processor.process_csv_files(str(first))
+
+    activity = processor.data['ACTIVITY_LOG']
+    assert len(activity) == 4
+    assert sorted(activity['User Full Name *Anonymized']) == ['a', 'b', 'c', 'x']
+
+def test_saved_index_catches_duplicates_in_a_new_run(tmp_path):
+    frame = pd.DataFrame({'User': ['a', 'b', 'c'], 'Component': ['Quiz', 'Quiz', 'Course']})
+    index = RowHashIndex(tmp_path)
+    kept, within, across = index.deduplicate(str(tmp_path / "first.csv"), frame)
+    assert (len(kept), within, across) == (3, 0, 0)
+    index.save()
+
+    # A later run starts from the saved index only
+    reloaded = RowHashIndex(tmp_path)
+    later = pd.DataFrame({'Component': ['Quiz', 'Course'], 'User': ['b', 'd']})
+    kept, within, across = reloaded.deduplicate(str(tmp_path / "second.csv"), later)
+    assert list(kept['User']) == ['d']
+    assert (within, across) == (0, 1)
+
+def test_failed_rebuild_keeps_index(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    first = tmp_path / "january" / "ACTIVITY_LOG.csv"
+    second = tmp_path / "february" / "ACTIVITY_LOG.csv"
+    write_export(first, ['a', 'b'])
+    write_export(second, ['a', 'b', 'c'])
+
+    processor = DataProcessor(tmp_path / "backup")
+    processor.process_csv_files(str(first), str(second))
+    before = {source: hashes.copy() for source, hashes in processor.row_index.hashes.items()}
+
+    write_export(first, ['a', 'b', 'x'])
+    clean = processor._clean_csv_data
+
+    def fail_on_second(file_path, *args, **kwargs):
+        if file_path == second:
+            raise Exception("file is locked")
+        return clean(file_path, *args, **kwargs)
+    monkeypatch.setattr(processor, '_clean_csv_data', fail_on_second)
+
+    processor.forget_file(str(first))
+    processor.process_csv_files(str(first))
+
+    assert processor.row_index.hashes.keys() == before.keys()
+    for source, hashes in before.items():
+        assert np.array_equal(processor.row_index.hashes[source], hashes)
+    assert len(processor.data['ACTIVITY_LOG']) == 3
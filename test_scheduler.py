@@ -0,0 +1,29 @@
+import pandas as pd
+from data_storage import DataProcessor
+from scheduler import IngestionScheduler
+
+def test_downstream_failure_is_reported_and_retried(tmp_path, monkeypatch):
+    input_dir = tmp_path / "datasets"
+    input_dir.mkdir()
+    pd.DataFrame({'Component': ['Quiz', 'Course']}).to_csv(input_dir / "COMPONENT_CODES.csv", index=False)
+
+    processor = DataProcessor(tmp_path / "backup")
+    updates = []
+    scheduler = IngestionScheduler(processor, input_dir, settle_seconds=1, on_update=updates.append)
+
+    def fail():
+        raise Exception("cannot convert NA to integer")
+    monkeypatch.setattr(processor, 'rename_user_column', fail)
+
+    assert scheduler.poll(now=0) is None
+    result = scheduler.poll(now=5)
+    assert result['error'] == "cannot convert NA to integer"
+    assert updates == [result]
+    assert not scheduler.known and len(scheduler.pending) == 1
+
+    # The batch runs again once the failure is gone
+    monkeypatch.undo()
+    assert scheduler.poll(now=5.5) is None
+    result = scheduler.poll(now=7)
+    assert 'error' not in result and len(result['files']) == 1
+    assert len(scheduler.known) == 1 and not scheduler.pending
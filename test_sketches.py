@@ -0,0 +1,104 @@
+import json
+import numpy as np
+import pandas as pd
+from data_storage import DataProcessor
+from sketches import HyperLogLog, QuantileSketch, EngagementSketches
+
+def random_hashes(n, seed):
+    return np.random.default_rng(seed).integers(0, 2 ** 63, size=n, dtype=np.uint64) * np.uint64(2)
+
+def activity(users, month='2024-01', component='Quiz'):
+    return pd.DataFrame({
+        'User_ID': users,
+        'Component': [component] * len(users),
+        'Month': [month] * len(users)
+    })
+
+def test_hyperloglog_estimate_is_close():
+    for n in (100, 10000, 200000):
+        sketch = HyperLogLog()
+        sketch.add_hashes(random_hashes(n, seed=n))
+        # Standard error is about 1.6% at precision 12
+        assert abs(sketch.estimate() - n) / n < 0.05
+
+def test_hyperloglog_merge_equals_union():
+    left, right, union = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    a, b = random_hashes(5000, seed=1), random_hashes(5000, seed=2)
+    left.add_hashes(a)
+    right.add_hashes(b)
+    union.add_hashes(np.concatenate([a, b]))
+
+    left.merge(right)
+    assert np.array_equal(left.registers, union.registers)
+
+def test_quantiles_within_relative_accuracy():
+    values = np.random.default_rng(0).lognormal(mean=3, sigma=1.5, size=50000)
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    sketch.add_values(values)
+
+    for q in (0.01, 0.25, 0.5, 0.9, 0.99):
+        exact = np.quantile(values, q, method='lower')
+        assert abs(sketch.quantile(q) - exact) / exact <= 0.01 + 1e-9
+
+def test_quantile_merge_equals_combined_values():
+    a, b = np.arange(1, 1000), np.arange(500, 3000)
+    left, right, combined = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    left.add_values(a)
+    right.add_values(b)
+    combined.add_values(np.concatenate([a, b]))
+
+    left.merge(right)
+    assert left.bins == combined.bins
+
+def test_engagement_round_trip():
+    sketches = EngagementSketches()
+    sketches.update(pd.concat([
+        activity(['a', 'b', 'b', 'c']),
+        activity(['a', 'd'], month='2024-02', component='Course')
+    ]))
+
+    restored = EngagementSketches.from_dict(json.loads(json.dumps(sketches.to_dict())))
+    assert restored.to_dict() == sketches.to_dict()
+    assert restored.summary() == sketches.summary()
+
+def test_merge_keeps_shards_and_only_adds_new_rows(tmp_path):
+    processor = DataProcessor(tmp_path / "backup")
+    shard = EngagementSketches()
+    shard.update(activity(['x', 'y'], month='2023-12'))
+    processor.merge_sketches(shard)
+
+    first = activity(['a', 'b', 'c'])
+    second = activity(['d', 'e'], month='2024-02')
+    processor._update_sketches(first)
+    processor._update_sketches(pd.concat([first, second], ignore_index=True))
+
+    expected = EngagementSketches()
+    expected.update(first)
+    expected.update(second)
+    assert processor.sketches.to_dict() == expected.to_dict()
+
+    # Merged-in shards survive every merge
+    combined = processor.engagement_sketches()
+    assert combined.months() == ['2023-12', '2024-01', '2024-02']
+    assert combined.distinct_users() == 7
+
+def test_removed_rows_rebuild_sketches(tmp_path):
+    processor = DataProcessor(tmp_path / "backup")
+    processor._update_sketches(activity(['a', 'b', 'c']))
+    processor._update_sketches(activity(['a', 'b']))
+
+    expected = EngagementSketches()
+    expected.update(activity(['a', 'b']))
+    assert processor.sketches.to_dict() == expected.to_dict()
+
+def test_sketches_survive_saved_state(tmp_path):
+    processor = DataProcessor(tmp_path / "backup")
+    shard = EngagementSketches()
+    shard.update(activity(['x'], month='2023-12'))
+    processor.merge_sketches(shard)
+    processor._update_sketches(activity(['a', 'b']))
+    processor._save_state()
+
+    restored = DataProcessor(tmp_path / "backup")
+    assert restored.engagement_sketches().to_dict() == processor.engagement_sketches().to_dict()
+    assert np.array_equal(restored._sketched_rows, processor._sketched_rows)